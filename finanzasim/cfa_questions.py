@@ -1,8 +1,15 @@
 from __future__ import annotations
 
 import random
-from dataclasses import dataclass
-from typing import Dict, List, Sequence
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Sequence, Tuple
+
+
+_RNG = random.Random()
+
+# Impact vector of an option that leaves the decision unchanged.
+NEUTRAL_IMPACT_VEC: Tuple[float, float, float, float, float, float] = (1.0, 0.0, 1.0, 0.0, 1.0, 0.0)
 
 
 @dataclass(frozen=True)
@@ -10,6 +17,23 @@ class QuestionOption:
     id: str
     text: str
     impact: Dict[str, float]
+    # (production_multiplier, production_delta, price_multiplier, price_delta,
+    #  marketing_multiplier, marketing_delta), resolved once from ``impact``.
+    impact_vec: Tuple[float, float, float, float, float, float] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(
+            self,
+            "impact_vec",
+            (
+                self.impact.get("production_multiplier", 1.0),
+                self.impact.get("production_delta", 0.0),
+                self.impact.get("price_multiplier", 1.0),
+                self.impact.get("price_delta", 0.0),
+                self.impact.get("marketing_multiplier", 1.0),
+                self.impact.get("marketing_delta", 0.0),
+            ),
+        )
 
 
 @dataclass(frozen=True)
@@ -21,33 +45,24 @@ class Question:
 
 def apply_option_impact(decision: Dict[str, float], option: QuestionOption) -> Dict[str, float]:
     """Return a new decision dict adjusted by the option's impact factors."""
-    production = max(
-        0.0,
-        decision.get("production", 0.0) * option.impact.get("production_multiplier", 1.0)
-        + option.impact.get("production_delta", 0.0),
-    )
-    price = max(
-        0.0,
-        decision.get("price", 0.0) * option.impact.get("price_multiplier", 1.0)
-        + option.impact.get("price_delta", 0.0),
-    )
-    marketing = max(
-        0.0,
-        decision.get("marketing", 0.0) * option.impact.get("marketing_multiplier", 1.0)
-        + option.impact.get("marketing_delta", 0.0),
-    )
+    production_mult, production_delta, price_mult, price_delta, marketing_mult, marketing_delta = option.impact_vec
+    production = decision.get("production", 0.0) * production_mult + production_delta
+    price = decision.get("price", 0.0) * price_mult + price_delta
+    marketing = decision.get("marketing", 0.0) * marketing_mult + marketing_delta
     return {
-        "production": production,
-        "price": price,
-        "marketing": marketing,
+        "production": production if production > 0.0 else 0.0,
+        "price": price if price > 0.0 else 0.0,
+        "marketing": marketing if marketing > 0.0 else 0.0,
     }
 
 
-def pick_random_question(exclude_ids: Sequence[str] | None = None) -> Question:
-    available = [q for q in QUESTION_BANK if not exclude_ids or q.id not in exclude_ids]
-    if not available:
-        available = list(QUESTION_BANK)
-    return random.choice(available)
+@lru_cache(maxsize=256)
+def _available_questions(exclude_ids: FrozenSet[str]) -> Tuple[Question, ...]:
+    return tuple(q for q in QUESTION_BANK if q.id not in exclude_ids) or tuple(QUESTION_BANK)
+
+
+def pick_random_question(exclude_ids: Sequence[str] | None = None, rng: random.Random | None = None) -> Question:
+    return (rng or _RNG).choice(_available_questions(frozenset(exclude_ids or ())))
 
 
 QUESTION_BANK: List[Question] = [
@@ -235,3 +250,6 @@ QUESTION_BANK: List[Question] = [
 
 
 QUESTION_INDEX = {q.id: q for q in QUESTION_BANK}
+OPTIONS_BY_QUESTION: Dict[Tuple[str, str], QuestionOption] = {
+    (q.id, option.id): option for q in QUESTION_BANK for option in q.options
+}
@@ -13,3 +13,4 @@ class SimulationConstants:
 
 
 SIMULATION_CONSTANTS = SimulationConstants()
+MAX_QUARTERS = 4
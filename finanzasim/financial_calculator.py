@@ -1,20 +1,43 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Dict, Tuple
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Sequence, Tuple
 
-from .constants import SIMULATION_CONSTANTS
+import numpy as np
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional: the kernels below then run as plain Python
 
-@dataclass
-class Decision:
-    production: float
-    price: float
-    marketing: float
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
 
+from .constants import MAX_QUARTERS, SIMULATION_CONSTANTS
 
-@dataclass
-class FinancialSnapshot:
+# Bound once as plain floats: cheaper than attribute lookups in the NumPy batch path. The Numba
+# kernels take them as arguments (_KERNEL_CONSTANTS) instead of reading these globals, because
+# Numba freezes globals into the compiled code and its on-disk cache would ignore later edits.
+_COST_PER_UNIT = float(SIMULATION_CONSTANTS.cost_per_unit)
+_FIXED_OPEX = float(SIMULATION_CONSTANTS.fixed_opex)
+_TAX_RATE = float(SIMULATION_CONSTANTS.tax_rate)
+_BASE_DEMAND = float(SIMULATION_CONSTANTS.base_demand)
+_MARKETING_EFFECT = float(SIMULATION_CONSTANTS.marketing_effect_per_dollar)
+_PRICE_ELASTICITY = float(SIMULATION_CONSTANTS.price_elasticity)
+_REFERENCE_PRICE = float(SIMULATION_CONSTANTS.reference_price)
+_KERNEL_CONSTANTS = (
+    _COST_PER_UNIT,
+    _FIXED_OPEX,
+    _TAX_RATE,
+    _BASE_DEMAND,
+    _MARKETING_EFFECT,
+    _PRICE_ELASTICITY,
+    _REFERENCE_PRICE,
+)
+
+
+class FinancialSnapshot(NamedTuple):
     quarter: int
     cash: float
     inventory: float
@@ -35,45 +58,191 @@ class FinancialSnapshot:
     production: float = 0.0
 
 
-def calculate_demand(decision: Decision) -> float:
-    price_effect = (SIMULATION_CONSTANTS.reference_price - decision.price) * SIMULATION_CONSTANTS.price_elasticity
-    marketing_effect = decision.marketing * SIMULATION_CONSTANTS.marketing_effect_per_dollar
-    raw_demand = SIMULATION_CONSTANTS.base_demand + price_effect + marketing_effect
-    return max(0, raw_demand)
+SNAPSHOT_FIELDS: Tuple[str, ...] = FinancialSnapshot._fields
+SNAPSHOT_COLUMNS: Dict[str, int] = {name: idx for idx, name in enumerate(SNAPSHOT_FIELDS)}
+
+# _simulate_game rows hold SNAPSHOT_FIELDS[1:] (everything but quarter). _simulate_core returns the
+# cash..net_margin fields in order; the decision inputs are written to their own columns after it.
+# Derived here (same module as the kernels, so Numba's cache is invalidated when they change).
+_GAME_ROW_WIDTH = len(SNAPSHOT_FIELDS) - 1
+_GAME_CORE_WIDTH = SNAPSHOT_COLUMNS["net_margin"] - SNAPSHOT_COLUMNS["cash"] + 1
+_GAME_PRICE_COLUMN = SNAPSHOT_COLUMNS["price"] - 1
+_GAME_MARKETING_COLUMN = SNAPSHOT_COLUMNS["marketing"] - 1
+_GAME_PRODUCTION_COLUMN = SNAPSHOT_COLUMNS["production"] - 1
+
+
+class FinancialHistory:
+    """A company's snapshots stored as rows of a float64 matrix (one column per ``SNAPSHOT_FIELDS``).
+
+    Reads behave like the former list of dicts for ``history[-1]["cash"]``, iteration and ``len``,
+    but indexing and iteration return read-only views built from the matrix: writes such as
+    ``history[-1]["cash"] = 0`` raise ``TypeError`` instead of being silently lost, and so do
+    slices. Use ``append``/``append_row`` to change history and ``to_list`` for plain dict copies.
+    Missing fields in appended mappings are stored as zero.
+    """
+
+    __slots__ = ("rows", "count")
+
+    def __init__(self, snapshots: Iterable[Mapping] = ()):
+        self.rows = np.zeros((MAX_QUARTERS + 1, len(SNAPSHOT_FIELDS)))
+        self.count = 0
+        for snapshot in snapshots:
+            self.append(snapshot)
+
+    def _next_row(self) -> np.ndarray:
+        if self.count == len(self.rows):
+            self.rows = np.concatenate([self.rows, np.zeros_like(self.rows)])
+        self.count += 1
+        return self.rows[self.count - 1]
+
+    def append(self, snapshot: Mapping) -> None:
+        # Build the row before claiming it, so a bad key or value leaves the history unchanged.
+        row = np.zeros(len(SNAPSHOT_FIELDS))
+        for name, value in snapshot.items():
+            row[SNAPSHOT_COLUMNS[name]] = value
+        self._next_row()[:] = row
+
+    def append_row(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        if values.shape != (len(SNAPSHOT_FIELDS),):
+            raise ValueError(f"Expected {len(SNAPSHOT_FIELDS)} snapshot values, got shape {values.shape}")
+        self._next_row()[:] = values
+
+    def latest_row(self) -> np.ndarray:
+        return self.rows[self.count - 1]
 
+    def column(self, name: str) -> np.ndarray:
+        return self.rows[: self.count, SNAPSHOT_COLUMNS[name]]
 
-def calculate_ratios(financial_snapshot: FinancialSnapshot) -> Tuple[float, float]:
-    current_assets = financial_snapshot.cash + financial_snapshot.inventory
-    current_liabilities = financial_snapshot.debt
-    liquidity_ratio = float("inf") if current_liabilities == 0 else current_assets / current_liabilities
-    net_margin = 0 if financial_snapshot.revenue == 0 else financial_snapshot.net_income / financial_snapshot.revenue
-    return liquidity_ratio, net_margin
+    def __len__(self) -> int:
+        return self.count
 
+    def __getitem__(self, index: int) -> Mapping[str, float]:
+        if isinstance(index, slice):
+            raise TypeError("FinancialHistory does not support slicing; use to_list() or column()")
+        return MappingProxyType(_row_to_dict(self.rows[: self.count][index]))
 
-def simulate_quarter(previous: Dict, decision: Dict) -> FinancialSnapshot:
-    decision_obj = Decision(**decision)
-    demand = calculate_demand(decision_obj)
-    available_units = decision_obj.production + previous["inventory"]
-    units_sold = min(demand, available_units)
+    def __iter__(self) -> Iterator[Mapping[str, float]]:
+        return (MappingProxyType(snapshot) for snapshot in self.to_list())
 
-    revenue = units_sold * decision_obj.price
-    cogs = units_sold * SIMULATION_CONSTANTS.cost_per_unit
+    def to_list(self) -> List[Dict[str, float]]:
+        return [_row_to_dict(row) for row in self.rows[: self.count]]
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source: Any, handler: Any) -> Any:
+        # Lets FastAPI document and serialize Company.financials as a list of snapshot dicts.
+        from pydantic_core import core_schema
+
+        list_schema = core_schema.no_info_after_validator_function(
+            cls,
+            core_schema.list_schema(core_schema.dict_schema(core_schema.str_schema(), core_schema.float_schema())),
+        )
+        return core_schema.json_or_python_schema(
+            json_schema=list_schema,
+            python_schema=core_schema.union_schema([core_schema.is_instance_schema(cls), list_schema]),
+            serialization=core_schema.plain_serializer_function_ser_schema(cls.to_list),
+        )
+
+
+def _row_to_dict(row: np.ndarray) -> Dict[str, float]:
+    snapshot = dict(zip(SNAPSHOT_FIELDS, row.tolist()))
+    snapshot["quarter"] = int(snapshot["quarter"])
+    return snapshot
+
+
+@njit(cache=True)
+def _simulate_core(
+    prev_cash: float,
+    prev_inventory: float,
+    prev_equity: float,
+    production: float,
+    price: float,
+    marketing: float,
+    cost_per_unit: float,
+    fixed_opex: float,
+    tax_rate: float,
+    base_demand: float,
+    marketing_effect_per_dollar: float,
+    price_elasticity: float,
+    reference_price: float,
+) -> Tuple[float, ...]:
+    price_effect = (reference_price - price) * price_elasticity
+    marketing_effect = marketing * marketing_effect_per_dollar
+    raw_demand = base_demand + price_effect + marketing_effect
+    demand = raw_demand if raw_demand > 0.0 else 0.0
+    units_sold = min(demand, production + prev_inventory)
+
+    revenue = units_sold * price
+    cogs = units_sold * cost_per_unit
     gross_profit = revenue - cogs
 
-    operating_expenses = SIMULATION_CONSTANTS.fixed_opex + decision_obj.marketing
+    operating_expenses = fixed_opex + marketing
     ebit = gross_profit - operating_expenses
-    taxes = max(0, ebit * SIMULATION_CONSTANTS.tax_rate)
+    tax_due = ebit * tax_rate
+    taxes = tax_due if tax_due > 0.0 else 0.0
     net_income = ebit - taxes
 
-    cash_change = revenue - (decision_obj.production * SIMULATION_CONSTANTS.cost_per_unit) - operating_expenses
-    new_cash = previous["cash"] + cash_change
-    debt = max(0, -new_cash)
-    adjusted_cash = max(0, new_cash)
-    new_inventory = previous["inventory"] + decision_obj.production - units_sold
-    new_equity = previous["equity"] + net_income
+    cash_change = revenue - (production * cost_per_unit) - operating_expenses
+    new_cash = prev_cash + cash_change
+    debt = -new_cash if new_cash < 0.0 else 0.0
+    adjusted_cash = new_cash if new_cash > 0.0 else 0.0
+    new_inventory = prev_inventory + production - units_sold
+    new_equity = prev_equity + net_income
+
+    liquidity_ratio = np.inf if debt == 0 else (adjusted_cash + new_inventory) / debt
+    net_margin = 0.0 if revenue == 0 else net_income / revenue
+    return (
+        adjusted_cash,
+        new_inventory,
+        new_equity,
+        debt,
+        revenue,
+        cogs,
+        gross_profit,
+        operating_expenses,
+        ebit,
+        taxes,
+        net_income,
+        units_sold,
+        liquidity_ratio,
+        net_margin,
+    )
+
 
-    snapshot = FinancialSnapshot(
+def simulate_quarter(previous: Mapping, production: float, price: float, marketing: float) -> FinancialSnapshot:
+    production = float(production)
+    price = float(price)
+    marketing = float(marketing)
+    (
+        cash,
+        inventory,
+        equity,
+        debt,
+        revenue,
+        cogs,
+        gross_profit,
+        operating_expenses,
+        ebit,
+        taxes,
+        net_income,
+        units_sold,
+        liquidity_ratio,
+        net_margin,
+    ) = _simulate_core(
+        float(previous["cash"]),
+        float(previous["inventory"]),
+        float(previous["equity"]),
+        production,
+        price,
+        marketing,
+        *_KERNEL_CONSTANTS,
+    )
+    return FinancialSnapshot(
         quarter=previous["quarter"] + 1,
+        cash=cash,
+        inventory=inventory,
+        equity=equity,
+        debt=debt,
         revenue=revenue,
         cogs=cogs,
         gross_profit=gross_profit,
@@ -81,17 +250,165 @@ def simulate_quarter(previous: Dict, decision: Dict) -> FinancialSnapshot:
         ebit=ebit,
         taxes=taxes,
         net_income=net_income,
-        cash=adjusted_cash,
-        inventory=new_inventory,
-        debt=debt,
-        equity=new_equity,
         units_sold=units_sold,
-        production=decision_obj.production,
-        price=decision_obj.price,
-        marketing=decision_obj.marketing,
+        liquidity_ratio=liquidity_ratio,
+        net_margin=net_margin,
+        price=price,
+        marketing=marketing,
+        production=production,
     )
 
-    liquidity_ratio, net_margin = calculate_ratios(snapshot)
-    snapshot.liquidity_ratio = liquidity_ratio
-    snapshot.net_margin = net_margin
-    return snapshot
+
+@njit(cache=True)
+def _simulate_game(
+    initial: np.ndarray,
+    decisions: np.ndarray,
+    impacts: np.ndarray,
+    cost_per_unit: float,
+    fixed_opex: float,
+    tax_rate: float,
+    base_demand: float,
+    marketing_effect_per_dollar: float,
+    price_elasticity: float,
+    reference_price: float,
+) -> np.ndarray:
+    # initial: (cash, inventory, equity); decisions: (quarters, 3) production/price/marketing;
+    # impacts: (quarters, 6) option impact vectors. Each output row holds SNAPSHOT_FIELDS[1:].
+    quarters = decisions.shape[0]
+    rows = np.empty((quarters, _GAME_ROW_WIDTH))
+    cash = initial[0]
+    inventory = initial[1]
+    equity = initial[2]
+    for quarter in range(quarters):
+        production = decisions[quarter, 0] * impacts[quarter, 0] + impacts[quarter, 1]
+        price = decisions[quarter, 1] * impacts[quarter, 2] + impacts[quarter, 3]
+        marketing = decisions[quarter, 2] * impacts[quarter, 4] + impacts[quarter, 5]
+        production = production if production > 0.0 else 0.0
+        price = price if price > 0.0 else 0.0
+        marketing = marketing if marketing > 0.0 else 0.0
+        result = _simulate_core(
+            cash,
+            inventory,
+            equity,
+            production,
+            price,
+            marketing,
+            cost_per_unit,
+            fixed_opex,
+            tax_rate,
+            base_demand,
+            marketing_effect_per_dollar,
+            price_elasticity,
+            reference_price,
+        )
+        for column in range(_GAME_CORE_WIDTH):
+            rows[quarter, column] = result[column]
+        rows[quarter, _GAME_PRICE_COLUMN] = price
+        rows[quarter, _GAME_MARKETING_COLUMN] = marketing
+        rows[quarter, _GAME_PRODUCTION_COLUMN] = production
+        cash = result[0]
+        inventory = result[1]
+        equity = result[2]
+    return rows
+
+
+def simulate_game(
+    initial: Mapping,
+    decisions: Sequence[Mapping],
+    impacts: Sequence[Tuple[float, ...]],
+) -> List[FinancialSnapshot]:
+    """Replay consecutive quarters from ``initial`` in one compiled loop.
+
+    ``decisions`` holds one production/price/marketing mapping per quarter and ``impacts`` the
+    ``QuestionOption.impact_vec`` applied on top of it (``NEUTRAL_IMPACT_VEC`` for no option).
+    """
+    rows = _simulate_game(
+        np.array([initial["cash"], initial["inventory"], initial["equity"]], dtype=np.float64),
+        np.array(
+            [[decision["production"], decision["price"], decision["marketing"]] for decision in decisions],
+            dtype=np.float64,
+        ).reshape(-1, 3),
+        np.array(impacts, dtype=np.float64).reshape(-1, 6),
+        *_KERNEL_CONSTANTS,
+    )
+    first_quarter = initial["quarter"] + 1
+    return [FinancialSnapshot(first_quarter + idx, *row) for idx, row in enumerate(rows.tolist())]
+
+
+# Compile (or load from the on-disk cache) at import so the first request doesn't pay JIT latency.
+simulate_quarter({"quarter": 0, "cash": 0.0, "inventory": 0.0, "equity": 0.0}, 0.0, 0.0, 0.0)
+_simulate_game(np.zeros(3), np.zeros((1, 3)), np.zeros((1, 6)), *_KERNEL_CONSTANTS)
+
+
+def simulate_quarter_batch(
+    previous: Mapping,
+    production: np.ndarray,
+    price: np.ndarray,
+    marketing: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """Vectorized ``simulate_quarter`` for many companies (or scenarios) at once.
+
+    ``previous`` holds ``quarter``, ``cash``, ``inventory`` and ``equity``. All inputs may be
+    scalars or 1-D arrays and are broadcast together. Returns one array per
+    ``FinancialSnapshot`` field.
+    """
+    prev_cash, prev_inventory, prev_equity, production, price, marketing = np.broadcast_arrays(
+        *(
+            np.asarray(value, dtype=np.float64)
+            for value in (
+                previous["cash"],
+                previous["inventory"],
+                previous["equity"],
+                production,
+                price,
+                marketing,
+            )
+        )
+    )
+
+    price_effect = (_REFERENCE_PRICE - price) * _PRICE_ELASTICITY
+    marketing_effect = marketing * _MARKETING_EFFECT
+    demand = np.maximum(0.0, _BASE_DEMAND + price_effect + marketing_effect)
+    units_sold = np.minimum(demand, production + prev_inventory)
+
+    revenue = units_sold * price
+    cogs = units_sold * _COST_PER_UNIT
+    gross_profit = revenue - cogs
+
+    operating_expenses = _FIXED_OPEX + marketing
+    ebit = gross_profit - operating_expenses
+    taxes = np.maximum(0.0, ebit * _TAX_RATE)
+    net_income = ebit - taxes
+
+    cash_change = revenue - (production * _COST_PER_UNIT) - operating_expenses
+    new_cash = prev_cash + cash_change
+    debt = np.maximum(0.0, -new_cash)
+    adjusted_cash = np.maximum(0.0, new_cash)
+    new_inventory = prev_inventory + production - units_sold
+    new_equity = prev_equity + net_income
+
+    liquidity_ratio = np.divide(
+        adjusted_cash + new_inventory, debt, out=np.full_like(debt, np.inf), where=debt != 0
+    )
+    net_margin = np.divide(net_income, revenue, out=np.zeros_like(revenue), where=revenue != 0)
+
+    return {
+        "quarter": np.broadcast_to(np.asarray(previous["quarter"]) + 1, production.shape),
+        "cash": adjusted_cash,
+        "inventory": new_inventory,
+        "equity": new_equity,
+        "debt": debt,
+        "revenue": revenue,
+        "cogs": cogs,
+        "gross_profit": gross_profit,
+        "operating_expenses": operating_expenses,
+        "ebit": ebit,
+        "taxes": taxes,
+        "net_income": net_income,
+        "units_sold": units_sold,
+        "liquidity_ratio": liquidity_ratio,
+        "net_margin": net_margin,
+        "price": price,
+        "marketing": marketing,
+        "production": production,
+    }
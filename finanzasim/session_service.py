@@ -1,22 +1,33 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Dict
+import random
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Any, Dict, Tuple
 
-from .cfa_questions import QUESTION_INDEX, apply_option_impact, pick_random_question
-from .financial_calculator import simulate_quarter
+import numpy as np
+import orjson
+
+from .cfa_questions import OPTIONS_BY_QUESTION, apply_option_impact, pick_random_question
+from .constants import MAX_QUARTERS
+from .financial_calculator import SNAPSHOT_COLUMNS, SNAPSHOT_FIELDS, FinancialHistory, simulate_quarter_batch
 
 
 @dataclass
 class Company:
     name: str
-    financials: list
-    decisions: Dict
-    agent_chat: list
+    financials: FinancialHistory
+    decisions: Dict = field(default_factory=dict)
+    agent_chat: list = field(default_factory=list)
     active_question_id: str | None = None
     selected_option_id: str | None = None
     question_history: list | None = None
 
+    def __post_init__(self) -> None:
+        if not isinstance(self.financials, FinancialHistory):
+            self.financials = FinancialHistory(self.financials)
+
 
 @dataclass
 class Session:
@@ -26,102 +37,136 @@ class Session:
     current_quarter: int
     last_update_time: int
     companies: Dict[str, Company]
+    version: int = 0
+
+
+def json_default(obj: Any) -> Any:
+    """orjson ``default`` hook for the non-dataclass values stored in a session."""
+    if isinstance(obj, FinancialHistory):
+        return obj.to_list()
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
 
 
 class InMemorySessionRepository:
     def __init__(self, initial_sessions: Dict[str, Session] | None = None):
         self.sessions = dict(initial_sessions or {})
+        # session id -> (version, JSON bytes); an entry is only served while its version is current.
+        self._response_cache: Dict[str, Tuple[int, bytes]] = {}
 
     def get_by_id(self, session_id: str) -> Session | None:
         return self.sessions.get(session_id)
 
+    def get_serialized(self, session_id: str) -> bytes | None:
+        """Return the session as JSON bytes, serialized at most once per saved version."""
+        session = self.sessions.get(session_id)
+        if session is None:
+            return None
+        cached = self._response_cache.get(session_id)
+        if cached is not None and cached[0] == session.version:
+            return cached[1]
+        # Read the version before serializing: if a save lands meanwhile, the entry is tagged with
+        # the older version and is rebuilt on the next read instead of being served as current.
+        version = session.version
+        payload = orjson.dumps(session, default=json_default)
+        self._response_cache[session_id] = (version, payload)
+        return payload
+
     def save(self, session: Session) -> Session:
+        session.version += 1
         self.sessions[session.id] = session
         return session
 
 
 class SessionService:
-    def __init__(self, session_repository: InMemorySessionRepository):
+    def __init__(self, session_repository: InMemorySessionRepository, rng: random.Random | None = None):
         self.session_repository = session_repository
+        # Optional seeded generator for reproducible question draws; None uses the module RNG.
+        self.rng = rng
 
     def assign_quarter_questions(self, session_id: str) -> Session:
         session = self.session_repository.get_by_id(session_id)
         if not session:
             raise ValueError(f"Session {session_id} not found")
 
-        updated_companies: Dict[str, Company] = {}
-        for company_id, company in session.companies.items():
-            history = list(company.question_history or [])
-            question = pick_random_question(history)
-            history.append(question.id)
-
-            updated_companies[company_id] = Company(
-                name=company.name,
-                financials=list(company.financials),
-                decisions=dict(company.decisions),
-                agent_chat=list(company.agent_chat),
-                active_question_id=question.id,
-                selected_option_id=None,
-                question_history=history,
-            )
-
-        updated_session = Session(
-            id=session.id,
-            game_code=session.game_code,
-            game_status=session.game_status,
-            current_quarter=session.current_quarter,
-            last_update_time=session.last_update_time,
-            companies=updated_companies,
-        )
+        self.assign_questions_to_companies(session.companies)
+        return self.session_repository.save(session)
 
-        return self.session_repository.save(updated_session)
+    def assign_questions_to_companies(self, companies: Dict[str, Company]) -> None:
+        """Give each company a new question for the quarter, updating the companies in place."""
+        for company in companies.values():
+            if company.question_history is None:
+                company.question_history = []
+            question = pick_random_question(company.question_history, self.rng)
+            company.question_history.append(question.id)
+            company.active_question_id = question.id
+            company.selected_option_id = None
 
     def close_quarter(self, session_id: str) -> Session:
         session = self.session_repository.get_by_id(session_id)
         if not session:
             raise ValueError(f"Session {session_id} not found")
 
-        updated_companies: Dict[str, Company] = {}
-        for company_id, company in session.companies.items():
-            previous_financials = company.financials[-1]
+        self._close_quarter(session, open_next_quarter=False)
+        return self.session_repository.save(session)
+
+    def advance_quarter(self, session_id: str) -> Session:
+        """Close the quarter and, unless the game is over, open the next one in the same pass.
+
+        Equivalent to ``close_quarter`` + ``assign_quarter_questions`` + resetting the quarter
+        timer, with a single save.
+        """
+        session = self.session_repository.get_by_id(session_id)
+        if not session:
+            raise ValueError(f"Session {session_id} not found")
+
+        self._close_quarter(session, open_next_quarter=True)
+        if session.game_status != "Finished":
+            session.last_update_time = int(time.time())
+        return self.session_repository.save(session)
+
+    def _close_quarter(self, session: Session, open_next_quarter: bool) -> None:
+        companies = list(session.companies.values())
+        question_ids = []
+        effective_decisions = []
+        for company in companies:
             base_decision = company.decisions
 
-            question_id = company.active_question_id or pick_random_question().id
-            selected_option = None
-            if question := QUESTION_INDEX.get(question_id):
-                selected_option = next(
-                    (option for option in question.options if option.id == company.selected_option_id),
-                    None,
-                )
+            question_id = company.active_question_id or pick_random_question(rng=self.rng).id
+            selected_option = OPTIONS_BY_QUESTION.get((question_id, company.selected_option_id))
 
-            effective_decision = (
+            question_ids.append(question_id)
+            effective_decisions.append(
                 apply_option_impact(base_decision, selected_option) if selected_option else base_decision
             )
 
-            result = simulate_quarter(previous_financials, effective_decision)
-            history = list(company.question_history or [])
-            if not history or history[-1] != question_id:
-                history.append(question_id)
-            updated_companies[company_id] = Company(
-                name=company.name,
-                financials=company.financials + [result.__dict__],
-                decisions={},
-                agent_chat=list(company.agent_chat),
-                active_question_id=None,
-                selected_option_id=None,
-                question_history=history,
-            )
-
-        next_quarter = session.current_quarter + 1
-        game_status = "Finished" if next_quarter > 4 else f"Q{next_quarter}"
-
-        updated_session = Session(
-            id=session.id,
-            game_code=session.game_code,
-            game_status=game_status,
-            current_quarter=next_quarter,
-            last_update_time=session.last_update_time,
-            companies=updated_companies,
+        previous = np.array([company.financials.latest_row() for company in companies]).reshape(
+            -1, len(SNAPSHOT_FIELDS)
         )
-
-        return self.session_repository.save(updated_session)
+        results = simulate_quarter_batch(
+            {key: previous[:, SNAPSHOT_COLUMNS[key]] for key in ("quarter", "cash", "inventory", "equity")},
+            *(
+                np.array([decision[key] for decision in effective_decisions], dtype=np.float64)
+                for key in ("production", "price", "marketing")
+            ),
+        )
+        result_rows = np.column_stack([results[name] for name in SNAPSHOT_FIELDS])
+
+        session.current_quarter += 1
+        finished = session.current_quarter > MAX_QUARTERS
+        session.game_status = "Finished" if finished else f"Q{session.current_quarter}"
+
+        for company, question_id, result in zip(companies, question_ids, result_rows):
+            if company.question_history is None:
+                company.question_history = []
+            if not company.question_history or company.question_history[-1] != question_id:
+                company.question_history.append(question_id)
+            company.financials.append_row(result)
+            company.decisions = {}
+            company.active_question_id = None
+            company.selected_option_id = None
+            if open_next_quarter and not finished:
+                next_question = pick_random_question(company.question_history, self.rng)
+                company.question_history.append(next_question.id)
+                company.active_question_id = next_question.id
@@ -1,11 +1,14 @@
 import time
 import uuid
-from typing import Dict
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict
 
+import orjson
 from fastapi import FastAPI, HTTPException
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from pydantic import BaseModel
+from fastapi.responses import FileResponse, JSONResponse, Response
+from pydantic import BaseModel, ConfigDict
 
 from finanzasim.session_service import (
     Company,
@@ -13,11 +16,15 @@ from finanzasim.session_service import (
     InMemorySessionRepository,
     Session,
     SessionService,
+    json_default,
 )
-from finanzasim.cfa_questions import QUESTION_INDEX, Question
+from finanzasim.cfa_questions import NEUTRAL_IMPACT_VEC, OPTIONS_BY_QUESTION, QUESTION_INDEX, Question
+from finanzasim.financial_calculator import simulate_game
 
-# Initial state for a new company
-INITIAL_FINANCIALS = [
+STATIC_DIR = Path(__file__).resolve().parent / "static"
+
+# Initial state for a new company (read-only template, copied into each company's history)
+INITIAL_FINANCIALS = MappingProxyType(
     {
         "quarter": 0,
         "cash": 50_000,
@@ -38,32 +45,64 @@ INITIAL_FINANCIALS = [
         "marketing": 0.0,
         "production": 0.0,
     }
-]
+)
 
 # --- Pydantic Models for API validation ---
 
 class CompanyDecisionSubmission(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     company_id: str
     production: float
     price: float
     marketing: float
 
 class CompanyAnswer(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     company_id: str
     option_id: str
 
 class CreateSessionRequest(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     company_names: list[str]
 
+class QuarterDecision(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    production: float
+    price: float
+    marketing: float
+
+class ReplayRequest(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    company_id: str
+    decisions: list[QuarterDecision]
+    option_ids: list[str | None]
+
+class SessionUpdate(BaseModel):
+    ok: bool
+    version: int
+
 # --- API Implementation ---
 
+class OrjsonResponse(JSONResponse):
+    """JSON response rendered with orjson, without a jsonable_encoder/Pydantic pass."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=json_default, option=orjson.OPT_NON_STR_KEYS)
+
+
 app = FastAPI(
     title="FinanzaSim API",
     description="API for managing multiplayer financial simulation games.",
+    default_response_class=OrjsonResponse,
 )
 
 # Mount static files
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 
 
 # In-memory repository for simplicity
@@ -72,7 +111,7 @@ session_service = SessionService(session_repository)
 
 @app.get("/")
 async def read_index():
-    return FileResponse('static/index.html')
+    return FileResponse(STATIC_DIR / "index.html")
 
 @app.get("/questions/{question_id}", response_model=Question)
 def get_question(question_id: str):
@@ -97,12 +136,12 @@ def create_session(request: CreateSessionRequest):
         company_id = name.lower().replace(" ", "_")
         companies[company_id] = Company(
             name=name,
-            financials=list(INITIAL_FINANCIALS),
-            decisions={},
-            agent_chat=[],
+            financials=[INITIAL_FINANCIALS],
             question_history=[],
         )
 
+    session_service.assign_questions_to_companies(companies)
+
     new_session = Session(
         id=session_id,
         game_code=game_code,
@@ -111,11 +150,8 @@ def create_session(request: CreateSessionRequest):
         last_update_time=int(time.time()),
         companies=companies,
     )
-    # Save the session first
     session_repository.save(new_session)
-    # Then assign questions, which will update and save it again
-    session_with_questions = session_service.assign_quarter_questions(session_id)
-    return session_with_questions
+    return OrjsonResponse(new_session, status_code=201)
 
 
 @app.get("/sessions/{session_id}", response_model=Session)
@@ -123,16 +159,17 @@ def get_session(session_id: str):
     """
     Retrieves the current state of a game session.
     """
-    session = session_repository.get_by_id(session_id)
-    if not session:
+    payload = session_repository.get_serialized(session_id)
+    if payload is None:
         raise HTTPException(status_code=404, detail="Session not found")
-    return session
+    return Response(content=payload, media_type="application/json")
 
 
-@app.post("/sessions/{session_id}/decisions", response_model=Session)
+@app.post("/sessions/{session_id}/decisions", response_model=SessionUpdate)
 def submit_decision(session_id: str, submission: CompanyDecisionSubmission):
     """
     Submits a company's financial decisions for the current quarter.
+    Returns the new session version; fetch the session again for the full state.
     """
     session = session_repository.get_by_id(session_id)
     if not session:
@@ -148,13 +185,14 @@ def submit_decision(session_id: str, submission: CompanyDecisionSubmission):
         "marketing": submission.marketing
     }
     session_repository.save(session)
-    return session
+    return OrjsonResponse({"ok": True, "version": session.version})
 
 
-@app.post("/sessions/{session_id}/answer", response_model=Session)
+@app.post("/sessions/{session_id}/answer", response_model=SessionUpdate)
 def submit_answer(session_id: str, answer: CompanyAnswer):
     """
     Submits a company's answer to the active question.
+    Returns the new session version; fetch the session again for the full state.
     """
     session = session_repository.get_by_id(session_id)
     if not session:
@@ -166,7 +204,7 @@ def submit_answer(session_id: str, answer: CompanyAnswer):
 
     company.selected_option_id = answer.option_id
     session_repository.save(session)
-    return session
+    return OrjsonResponse({"ok": True, "version": session.version})
 
 @app.post("/sessions/{session_id}/close_quarter", response_model=Session)
 def close_quarter(session_id: str):
@@ -174,13 +212,52 @@ def close_quarter(session_id: str):
     Closes the current quarter, simulates the results, and moves to the next quarter.
     """
     try:
-        updated_session = session_service.close_quarter(session_id)
-        # Assign questions for the new quarter if the game is not finished
-        if updated_session.game_status != "Finished":
-             session_with_new_questions = session_service.assign_quarter_questions(session_id)
-             session_with_new_questions.last_update_time = int(time.time())
-             session_repository.save(session_with_new_questions)
-             return session_with_new_questions
-        return updated_session
+        # Also assigns the next quarter's questions unless the game is finished
+        return OrjsonResponse(session_service.advance_quarter(session_id))
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+
+
+@app.post("/sessions/{session_id}/replay", response_model=list[Dict[str, float]])
+def replay_game(session_id: str, replay: ReplayRequest):
+    """
+    Replays a finished game for one company with alternative decisions and answers.
+
+    `option_ids[i]` answers the question the company received in quarter `i + 1`.
+    """
+    session = session_repository.get_by_id(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    if session.game_status != "Finished":
+        raise HTTPException(status_code=409, detail="Replay is only available for finished games")
+
+    company = session.companies.get(replay.company_id)
+    if not company:
+        raise HTTPException(status_code=404, detail=f"Company '{replay.company_id}' not found in session")
+
+    question_history = company.question_history or []
+    if len(replay.decisions) != len(replay.option_ids) or len(replay.decisions) > len(question_history):
+        raise HTTPException(
+            status_code=422,
+            detail="Provide one decision and one option per played quarter",
+        )
+
+    impacts = []
+    for question_id, option_id in zip(question_history, replay.option_ids):
+        if option_id is None:  # quarter left unanswered
+            impacts.append(NEUTRAL_IMPACT_VEC)
+            continue
+        option = OPTIONS_BY_QUESTION.get((question_id, option_id))
+        if option is None:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Option '{option_id}' does not exist for question '{question_id}'",
+            )
+        impacts.append(option.impact_vec)
+
+    snapshots = simulate_game(
+        company.financials[0],
+        [decision.model_dump() for decision in replay.decisions],
+        impacts,
+    )
+    return OrjsonResponse([snapshot._asdict() for snapshot in snapshots])
@@ -16,18 +16,31 @@
 # %%
 from __future__ import annotations
 
+import os
 import sys
-from math import isfinite
 from pathlib import Path
+from types import MappingProxyType
+from typing import Mapping, NamedTuple
 
-import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.append(str(PROJECT_ROOT))
 
-from finanzasim.financial_calculator import simulate_quarter
+from finanzasim.financial_calculator import FinancialSnapshot, simulate_quarter, simulate_quarter_batch
+
+# Las celdas de gráficas se saltan con FINANZASIM_NO_PLOTS=1 (p. ej. una prueba de humo sin pantalla):
+# así los cálculos se ejecutan de principio a fin sin importar matplotlib.
+DRAW_PLOTS = not os.environ.get("FINANZASIM_NO_PLOTS")
+
+
+def _plt():
+    """Importa matplotlib.pyplot la primera vez que una celda va a dibujar."""
+    import matplotlib.pyplot as plt
+
+    return plt
 
 # %% [markdown]
 # ## 1. Datos de entrada
@@ -89,45 +102,83 @@ inputs
 # Ajusta `inputs` y vuelve a ejecutar esta celda para recalcular todo.
 
 # %%
-def compute_indicators(values: dict) -> pd.DataFrame:
-    assets_total = values["AnC"] + values["AC"]
-    fm = values["AC"] - values["PC"]
-    cc = values["PN"] + values["PnC"] - values["AnC"]
-    nof = values["ACO"] - values["PCO"]
+INDICATOR_LABELS = (
+    "Fondo de Maniobra (FM)",
+    "Capital Corriente (CC)",
+    "Necesidades Operativas de Fondo (NOF)",
+    "Margen Bruto",
+    "Margen de Contribución",
+    "Punto Muerto (ventas)",
+    "ROA",
+    "ROE",
+    "Margen Neto",
+    "Rotación de Activos",
+    "Apalancamiento Financiero",
+    "EVA",
+)
 
-    margen_bruto = (values["Ventas"] - values["CosteVentas"]) / values["Ventas"]
-    margen_contribucion = (values["Ventas"] - values["CostesVariables"]) / values["Ventas"]
-    punto_muerto = values["CostesFijos"] / margen_contribucion if margen_contribucion != 0 else float("nan")
 
-    roa = values["BAIT"] / assets_total
-    roe = values["BN"] / values["PN"] if values["PN"] else float("nan")
+class IndicatorValues(NamedTuple):
+    fm: float
+    cc: float
+    nof: float
+    margen_bruto: float
+    margen_contribucion: float
+    punto_muerto: float
+    roa: float
+    roe: float
+    margen_neto: float
+    rotacion_activos: float
+    apalancamiento: float
+    eva: float
+
+
+def compute_indicators(values: dict) -> tuple[pd.DataFrame, IndicatorValues]:
+    pn, pnc, anc, ac, pc = values["PN"], values["PnC"], values["AnC"], values["AC"], values["PC"]
+    aco, pco = values["ACO"], values["PCO"]
+    ventas, coste_ventas = values["Ventas"], values["CosteVentas"]
+    costes_variables, costes_fijos = values["CostesVariables"], values["CostesFijos"]
+    bait, bn = values["BAIT"], values["BN"]
+    wacc, capital_empleado = values["WACC"], values["Capital_empleado"]
+
+    assets_total = anc + ac
+    # Aproximamos NOPAT con BAIT (sin impuestos explícitos en los inputs)
+    nopat = bait
+
+    # Cada indicador es numerador / denominador (1 para los que no son ratios). Un denominador
+    # nulo produce NaN. Punto muerto = CostesFijos / margen de contribución
+    # = CostesFijos * Ventas / (Ventas - CostesVariables).
+    numerators = np.array(
+        [
+            ac - pc,
+            pn + pnc - anc,
+            aco - pco,
+            ventas - coste_ventas,
+            ventas - costes_variables,
+            costes_fijos * ventas,
+            bait,
+            bn,
+            bn,
+            ventas,
+            assets_total,
+            nopat - wacc * capital_empleado,
+        ],
+        dtype=float,
+    )
+    denominators = np.array(
+        [1, 1, 1, ventas, ventas, ventas - costes_variables, assets_total, pn, ventas, assets_total, pn, 1],
+        dtype=float,
+    )
+    indicators = np.divide(
+        numerators, denominators, out=np.full(len(INDICATOR_LABELS), np.nan), where=denominators != 0
+    )
+    return (
+        pd.DataFrame({"Indicador": INDICATOR_LABELS, "Valor": indicators}),
+        IndicatorValues(*indicators.tolist()),
+    )
 
-    margen_neto = values["BN"] / values["Ventas"]
-    rotacion_activos = values["Ventas"] / assets_total if assets_total else float("nan")
-    apalancamiento = assets_total / values["PN"] if values["PN"] else float("nan")
 
-    # Aproximamos NOPAT con BAIT (sin impuestos explícitos en los inputs)
-    nopat = values["BAIT"]
-    eva = nopat - values["WACC"] * values["Capital_empleado"]
-
-    rows = [
-        ("Fondo de Maniobra (FM)", fm),
-        ("Capital Corriente (CC)", cc),
-        ("Necesidades Operativas de Fondo (NOF)", nof),
-        ("Margen Bruto", margen_bruto),
-        ("Margen de Contribución", margen_contribucion),
-        ("Punto Muerto (ventas)", punto_muerto),
-        ("ROA", roa),
-        ("ROE", roe),
-        ("Margen Neto", margen_neto),
-        ("Rotación de Activos", rotacion_activos),
-        ("Apalancamiento Financiero", apalancamiento),
-        ("EVA", eva),
-    ]
-    return pd.DataFrame(rows, columns=["Indicador", "Valor"])
-
-
-indicators_df = compute_indicators(inputs)
+indicators_df, indicator_values = compute_indicators(inputs)
 indicators_df
 
 # %% [markdown]
@@ -136,14 +187,15 @@ indicators_df
 # - Modifica los datos de `inputs` y vuelve a ejecutar para ver el efecto.
 
 # %%
-assets_total = inputs["AnC"] + inputs["AC"]
-margin = inputs["BN"] / inputs["Ventas"]
-turnover = inputs["Ventas"] / assets_total
-leverage = assets_total / inputs["PN"]
+# Reutiliza los factores ya calculados en `compute_indicators`.
 dupont_df = pd.DataFrame(
     {
         "Factor": ["Margen Neto", "Rotación de Activos", "Apalancamiento"],
-        "Valor": [margin, turnover, leverage],
+        "Valor": [
+            indicator_values.margen_neto,
+            indicator_values.rotacion_activos,
+            indicator_values.apalancamiento,
+        ],
     }
 )
 dupont_df
@@ -153,36 +205,40 @@ dupont_df
 # Usa estas visualizaciones rápidas para comparar liquidez, rentabilidad y creación de valor.
 
 # %%
-fig, axes = plt.subplots(1, 2, figsize=(12, 5))
+if DRAW_PLOTS:
+    plt = _plt()
 
-indicators_plot = indicators_df[indicators_df["Indicador"].isin(["ROA", "ROE", "Margen Neto", "Rotación de Activos"])]
-axes[0].bar(indicators_plot["Indicador"], indicators_plot["Valor"], color="#4B89DC")
-axes[0].set_title("Rentabilidad y eficiencia")
-axes[0].tick_params(axis="x", rotation=20)
-axes[0].grid(axis="y", linestyle="--", alpha=0.4)
+    fig, axes = plt.subplots(1, 2, figsize=(12, 5), layout="constrained")
 
-axes[1].bar(["EVA"], [indicators_df.loc[indicators_df["Indicador"] == "EVA", "Valor"].iloc[0]], color="#E67E22")
-axes[1].set_title("Valor Económico Añadido")
-axes[1].grid(axis="y", linestyle="--", alpha=0.4)
+    indicators_plot = indicators_df[indicators_df["Indicador"].isin(["ROA", "ROE", "Margen Neto", "Rotación de Activos"])]
+    axes[0].bar(indicators_plot["Indicador"], indicators_plot["Valor"], color="#4B89DC")
+    axes[0].set_title("Rentabilidad y eficiencia")
+    axes[0].tick_params(axis="x", rotation=20)
+    axes[0].grid(axis="y", linestyle="--", alpha=0.4)
 
-fig.tight_layout()
+    axes[1].bar(["EVA"], [indicators_df.loc[indicators_df["Indicador"] == "EVA", "Valor"].iloc[0]], color="#E67E22")
+    axes[1].set_title("Valor Económico Añadido")
+    axes[1].grid(axis="y", linestyle="--", alpha=0.4)
 
 # %% [markdown]
 # ## 3. Escenarios listos para jugar (20 casos)
 # Esta sección crea 20 situaciones con combinaciones de **producción**, **precio** e **inversión en marketing**.
-# Cada escenario se evalúa con el motor `simulate_quarter` del juego.
+# Cada escenario se evalúa con el motor del juego (`simulate_quarter_batch`, la versión vectorizada de `simulate_quarter`).
 #
 # - Ajusta la lista `SCENARIOS` para explorar decisiones distintas.
 # - Ejecuta la celda para recalcular ingresos, utilidad neta y liquidez de cada caso.
 # - Al final se generan gráficas para comparar resultados.
 
 # %%
-BASE_STATE = {
-    "quarter": 0,
-    "cash": 50_000,
-    "inventory": 1_000,
-    "equity": 50_000,
-}
+# Estado inicial compartido de solo lectura: cualquier intento de modificarlo lanza TypeError.
+BASE_STATE = MappingProxyType(
+    {
+        "quarter": 0,
+        "cash": 50_000,
+        "inventory": 1_000,
+        "equity": 50_000,
+    }
+)
 
 SCENARIOS = [
     {"production": 1200, "price": 55, "marketing": 0},
@@ -208,24 +264,36 @@ SCENARIOS = [
 ]
 assert len(SCENARIOS) == 20, "Debes mantener 20 casos."
 
-scenario_rows = []
-for idx, decision in enumerate(SCENARIOS, start=1):
-    result = simulate_quarter(BASE_STATE, decision)
-    liquidity = result.liquidity_ratio if isfinite(result.liquidity_ratio) else None
-    scenario_rows.append(
-        {
-            "Escenario": f"Caso {idx}",
-            "Producción": decision["production"],
-            "Precio": decision["price"],
-            "Marketing": decision["marketing"],
-            "Ingresos": result.revenue,
-            "Utilidad Neta": result.net_income,
-            "Liquidez": liquidity,
-            "Unidades Vendidas": result.units_sold,
-        }
-    )
-
-scenarios_df = pd.DataFrame(scenario_rows)
+# La lista se convierte una sola vez en un array estructurado (un registro de 24 bytes por caso) y los
+# 20 casos se simulan en una sola llamada vectorizada. Cada campo, p. ej. SCENARIOS_ARR["price"], es una
+# vista con salto de 24 bytes (no contigua); basta para las operaciones de NumPy. Precio y Marketing
+# quedan como float64, igual que los usa el motor de simulación.
+SCENARIOS_ARR = np.array(
+    [(decision["production"], decision["price"], decision["marketing"]) for decision in SCENARIOS],
+    dtype=[("production", "i8"), ("price", "f8"), ("marketing", "f8")],
+)
+production = SCENARIOS_ARR["production"]
+price = SCENARIOS_ARR["price"]
+marketing = SCENARIOS_ARR["marketing"]
+results = simulate_quarter_batch(BASE_STATE, production, price, marketing)
+# Sin deuda la razón circulante es infinita; NaN la deja fuera de la gráfica y mantiene la columna en float64.
+liquidity = results["liquidity_ratio"]
+liquidity = np.where(np.isfinite(liquidity), liquidity, np.nan)
+
+# Todas las columnas son arrays ya tipados; pandas solo los envuelve sin inferir tipos.
+scenario_labels = [f"Caso {idx}" for idx in range(1, len(SCENARIOS) + 1)]
+scenarios_df = pd.DataFrame(
+    {
+        "Escenario": pd.Categorical(scenario_labels, categories=scenario_labels),
+        "Producción": production,
+        "Precio": price,
+        "Marketing": marketing,
+        "Ingresos": results["revenue"],
+        "Utilidad Neta": results["net_income"],
+        "Liquidez": liquidity,
+        "Unidades Vendidas": results["units_sold"],
+    }
+)
 scenarios_df
 
 # %% [markdown]
@@ -234,30 +302,29 @@ scenarios_df
 # - **Liquidez**: observa cómo varía la razón circulante con cada combinación.
 
 # %%
-fig, axes = plt.subplots(1, 2, figsize=(16, 6))
-
-scenarios_df.plot(
-    x="Escenario",
-    y=["Ingresos", "Utilidad Neta"],
-    kind="bar",
-    ax=axes[0],
-    title="Ingresos y Utilidad Neta por escenario",
-)
-axes[0].tick_params(axis="x", rotation=45)
-axes[0].grid(axis="y", linestyle="--", alpha=0.4)
-
-scenarios_df.plot(
-    x="Escenario",
-    y="Liquidez",
-    kind="bar",
-    color="#27AE60",
-    ax=axes[1],
-    title="Razón circulante (Liquidez)",
-)
-axes[1].tick_params(axis="x", rotation=45)
-axes[1].grid(axis="y", linestyle="--", alpha=0.4)
-
-fig.tight_layout()
+if DRAW_PLOTS:
+    plt = _plt()
+
+    fig, axes = plt.subplots(1, 2, figsize=(16, 6), layout="constrained")
+
+    x = np.arange(len(scenarios_df))
+    width = 0.4
+    axes[0].bar(x - width / 2, scenarios_df["Ingresos"].to_numpy(), width, label="Ingresos")
+    axes[0].bar(x + width / 2, scenarios_df["Utilidad Neta"].to_numpy(), width, label="Utilidad Neta")
+    axes[0].set_xticks(x, scenarios_df["Escenario"])
+    axes[0].set_xlabel("Escenario")
+    axes[0].set_title("Ingresos y Utilidad Neta por escenario")
+    axes[0].legend()
+    axes[0].tick_params(axis="x", rotation=45)
+    axes[0].grid(axis="y", linestyle="--", alpha=0.4)
+
+    axes[1].bar(x, scenarios_df["Liquidez"].to_numpy(), color="#27AE60", label="Liquidez")
+    axes[1].set_xticks(x, scenarios_df["Escenario"])
+    axes[1].set_xlabel("Escenario")
+    axes[1].set_title("Razón circulante (Liquidez)")
+    axes[1].legend()
+    axes[1].tick_params(axis="x", rotation=45)
+    axes[1].grid(axis="y", linestyle="--", alpha=0.4)
 
 # %% [markdown]
 # ## 4. Dashboard trimestral estilo KPI
@@ -274,78 +341,104 @@ TIMELINE_DECISIONS = [
 ]
 
 
-def simulate_timeline(base_state: dict, decisions: list[dict]) -> list[FinancialSnapshot]:
+def simulate_timeline(base_state: Mapping, decisions: list[dict]) -> list[FinancialSnapshot]:
     """Simula varios trimestres consecutivos acumulando estados."""
 
     snapshots: list[FinancialSnapshot] = []
-    state = base_state.copy()
+    state = dict(base_state)
     for decision in decisions:
-        result = simulate_quarter(state, decision)
+        result = simulate_quarter(state, **decision)
         snapshots.append(result)
-        state = {
-            "quarter": result.quarter,
-            "cash": result.cash,
-            "inventory": result.inventory,
-            "equity": result.equity,
-        }
+        state["quarter"] = result.quarter
+        state["cash"] = result.cash
+        state["inventory"] = result.inventory
+        state["equity"] = result.equity
     return snapshots
 
 
 timeline_snaps = simulate_timeline(BASE_STATE, TIMELINE_DECISIONS)
+n_quarters = len(timeline_snaps)
+quarter_labels = []
+revenue_arr = np.empty(n_quarters)
+ni_arr = np.empty(n_quarters)
+equity_arr = np.empty(n_quarters)
+debt_arr = np.empty(n_quarters)
+cash_flow_arr = np.empty(n_quarters)
+price_arr = np.empty(n_quarters)
+ebit_arr = np.empty(n_quarters)
+gross_profit_arr = np.empty(n_quarters)
+prev_cash = BASE_STATE["cash"]
+for idx, snap in enumerate(timeline_snaps):
+    quarter_labels.append(f"Q{snap.quarter}")
+    revenue_arr[idx] = snap.revenue
+    ni_arr[idx] = snap.net_income
+    equity_arr[idx] = snap.equity
+    debt_arr[idx] = snap.debt
+    cash_flow_arr[idx] = snap.cash - prev_cash
+    prev_cash = snap.cash
+    price_arr[idx] = snap.price
+    ebit_arr[idx] = snap.ebit
+    gross_profit_arr[idx] = snap.gross_profit
+
+# ROI y D/E valen 0 en los trimestres con patrimonio nulo.
+roi_arr = np.divide(ni_arr, equity_arr, out=np.zeros(n_quarters), where=equity_arr != 0)
+de_arr = np.divide(debt_arr, equity_arr, out=np.zeros(n_quarters), where=equity_arr != 0)
+
 timeline_df = pd.DataFrame(
     {
-        "Quarter": [f"Q{snap.quarter}" for snap in timeline_snaps],
-        "Revenue": [snap.revenue for snap in timeline_snaps],
-        "ROI": [snap.net_income / snap.equity if snap.equity else 0 for snap in timeline_snaps],
-        "CashFlow": [snap.cash - (timeline_snaps[idx - 1].cash if idx else BASE_STATE["cash"]) for idx, snap in enumerate(timeline_snaps)],
-        "Price": [snap.price for snap in timeline_snaps],
-        "EBIT": [snap.ebit for snap in timeline_snaps],
-        "GrossProfit": [snap.gross_profit for snap in timeline_snaps],
-        "DE": [
-            (snap.debt / snap.equity) if snap.equity else 0
-            for snap in timeline_snaps
-        ],
+        "Quarter": pd.Categorical(quarter_labels, categories=quarter_labels),
+        "Revenue": revenue_arr,
+        "ROI": roi_arr,
+        "CashFlow": cash_flow_arr,
+        "Price": price_arr,
+        "EBIT": ebit_arr,
+        "GrossProfit": gross_profit_arr,
+        "DE": de_arr,
     }
 )
+timeline_df
 
-palette = ["#63C9F3", "#4DB3C8", "#E9B44C", "#EF767A"]
-
-fig, axes = plt.subplots(2, 3, figsize=(18, 10))
-
-# Revenue
-axes[0, 0].bar(timeline_df["Quarter"], timeline_df["Revenue"], color=palette)
-axes[0, 0].set_title("Revenue")
-axes[0, 0].grid(axis="y", linestyle="--", alpha=0.35)
-
-# ROI
-axes[0, 1].bar(timeline_df["Quarter"], timeline_df["ROI"], color="orange")
-axes[0, 1].set_title("Return on Investment")
-axes[0, 1].grid(axis="y", linestyle="--", alpha=0.35)
-
-# Cash Flow
-axes[0, 2].bar(timeline_df["Quarter"], timeline_df["CashFlow"], color="#5ac4a7")
-axes[0, 2].set_title("Cash Flow")
-axes[0, 2].grid(axis="y", linestyle="--", alpha=0.35)
-
-# Price trend
-axes[1, 0].plot(timeline_df["Quarter"], timeline_df["Price"], marker="o", color="#5564D8")
-axes[1, 0].set_title("Price")
-axes[1, 0].grid(axis="y", linestyle="--", alpha=0.35)
-
-# EBIT / Gross Profit
-axes[1, 1].bar(timeline_df["Quarter"], timeline_df["EBIT"], label="EBIT", color="#63C9F3")
-axes[1, 1].bar(timeline_df["Quarter"], timeline_df["GrossProfit"], label="Gross Profit", color="#FFB347", alpha=0.8)
-axes[1, 1].set_title("EBIT / Gross Profit")
-axes[1, 1].legend()
-axes[1, 1].grid(axis="y", linestyle="--", alpha=0.35)
-
-# D/E ratio
-axes[1, 2].plot(timeline_df["Quarter"], timeline_df["DE"], marker="s", color="#A26769")
-axes[1, 2].set_title("D/E Ratio")
-axes[1, 2].grid(axis="y", linestyle="--", alpha=0.35)
-
-fig.suptitle("Dashboard trimestral de métricas financieras", fontsize=16, y=0.98)
-fig.tight_layout(rect=[0, 0, 1, 0.96])
+# %%
+if DRAW_PLOTS:
+    plt = _plt()
+
+    palette = ["#63C9F3", "#4DB3C8", "#E9B44C", "#EF767A"]
+
+    fig, axes = plt.subplots(2, 3, figsize=(18, 10), layout="constrained")
+
+    # Revenue
+    axes[0, 0].bar(timeline_df["Quarter"], timeline_df["Revenue"], color=palette)
+    axes[0, 0].set_title("Revenue")
+    axes[0, 0].grid(axis="y", linestyle="--", alpha=0.35)
+
+    # ROI
+    axes[0, 1].bar(timeline_df["Quarter"], timeline_df["ROI"], color="orange")
+    axes[0, 1].set_title("Return on Investment")
+    axes[0, 1].grid(axis="y", linestyle="--", alpha=0.35)
+
+    # Cash Flow
+    axes[0, 2].bar(timeline_df["Quarter"], timeline_df["CashFlow"], color="#5ac4a7")
+    axes[0, 2].set_title("Cash Flow")
+    axes[0, 2].grid(axis="y", linestyle="--", alpha=0.35)
+
+    # Price trend
+    axes[1, 0].plot(timeline_df["Quarter"], timeline_df["Price"], marker="o", color="#5564D8")
+    axes[1, 0].set_title("Price")
+    axes[1, 0].grid(axis="y", linestyle="--", alpha=0.35)
+
+    # EBIT / Gross Profit
+    axes[1, 1].bar(timeline_df["Quarter"], timeline_df["EBIT"], label="EBIT", color="#63C9F3")
+    axes[1, 1].bar(timeline_df["Quarter"], timeline_df["GrossProfit"], label="Gross Profit", color="#FFB347", alpha=0.8)
+    axes[1, 1].set_title("EBIT / Gross Profit")
+    axes[1, 1].legend()
+    axes[1, 1].grid(axis="y", linestyle="--", alpha=0.35)
+
+    # D/E ratio
+    axes[1, 2].plot(timeline_df["Quarter"], timeline_df["DE"], marker="s", color="#A26769")
+    axes[1, 2].set_title("D/E Ratio")
+    axes[1, 2].grid(axis="y", linestyle="--", alpha=0.35)
+
+    fig.suptitle("Dashboard trimestral de métricas financieras", fontsize=16)
 
 # %% [markdown]
 # ✅ Con estas celdas puedes iterar decisiones, recalcular automáticamente y observar su impacto financiero con gráficas listas para presentar.
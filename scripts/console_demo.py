@@ -3,7 +3,8 @@ from __future__ import annotations
 import json
 import pathlib
 import sys
-from datetime import datetime
+import time
+from collections.abc import Mapping
 
 PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
 sys.path.append(str(PROJECT_ROOT))
@@ -18,7 +19,7 @@ def create_demo_session() -> Session:
         game_code="XYZ123",
         game_status="Q1",
         current_quarter=1,
-        last_update_time=int(datetime.now().timestamp()),
+        last_update_time=int(time.time()),
         companies={
             "alpha": Company(
                 name="Alpha Corp",
@@ -36,10 +37,8 @@ def create_demo_session() -> Session:
     )
 
 
-def print_company_snapshot(company: Company) -> None:
-    latest = company.financials[-1]
-    print(f"\n{company.name} - Q{latest['quarter']}")
-    print(json.dumps({
+def company_snapshot(latest: Mapping) -> dict:
+    return {
         "Cash": latest["cash"],
         "Inventory": latest["inventory"],
         "Debt": latest["debt"],
@@ -48,7 +47,7 @@ def print_company_snapshot(company: Company) -> None:
         "NetIncome": latest.get("net_income"),
         "Liquidity": latest.get("liquidity_ratio"),
         "NetMargin": latest.get("net_margin"),
-    }, indent=2))
+    }
 
 
 def run_demo() -> None:
@@ -60,40 +59,25 @@ def run_demo() -> None:
 
     print("=== FinanzaSim Console Demo (Python) ===")
     print("Preguntas CFA-style asignadas al inicio del trimestre:\n")
-    prepared_companies = {}
-    for company_id, company in session.companies.items():
+    for company in session.companies.values():
         question = QUESTION_INDEX[company.active_question_id]
         default_option = question.options[0]
         print(f"- {company.name}: {question.prompt}")
         for option in question.options:
             print(f"    {option.id}) {option.text}")
         print(f"  -> Demo selecciona opción {default_option.id}\n")
+        company.selected_option_id = default_option.id
 
-        prepared_companies[company_id] = Company(
-            name=company.name,
-            financials=list(company.financials),
-            decisions=dict(company.decisions),
-            agent_chat=list(company.agent_chat),
-            active_question_id=company.active_question_id,
-            selected_option_id=default_option.id,
-            question_history=list(company.question_history or []),
-        )
-
-    session = Session(
-        id=session.id,
-        game_code=session.game_code,
-        game_status=session.game_status,
-        current_quarter=session.current_quarter,
-        last_update_time=session.last_update_time,
-        companies=prepared_companies,
-    )
     repository.save(session)
 
     print("Cerrando trimestre para la sesión demo...\n")
     updated = service.close_quarter("demo-session")
 
+    snapshots = {}
     for company in updated.companies.values():
-        print_company_snapshot(company)
+        latest = company.financials[-1]
+        snapshots[f"{company.name} - Q{latest['quarter']}"] = company_snapshot(latest)
+    print(json.dumps(snapshots, indent=2))
 
     print("\nEstado de la sesión:", {
         "quarter": updated.current_quarter,
@@ -0,0 +1,13 @@
+import pathlib
+import sys
+
+import pytest
+
+PROJECT_ROOT = str(pathlib.Path(__file__).resolve().parents[1])
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+@pytest.fixture
+def base_state():
+    return {"quarter": 0, "cash": 50_000, "inventory": 1_000, "equity": 50_000, "debt": 0}
@@ -1,9 +1,3 @@
-import pathlib
-import sys
-
-PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
-sys.path.append(str(PROJECT_ROOT))
-
 from finanzasim.cfa_questions import QUESTION_INDEX, apply_option_impact
 from finanzasim.session_service import Company, InMemorySessionRepository, Session, SessionService
 
@@ -1,47 +1,145 @@
-import math
-import pathlib
-import sys
-
-PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
-sys.path.append(str(PROJECT_ROOT))
-
-from finanzasim.financial_calculator import simulate_quarter
-
-
-base_state = {"quarter": 0, "cash": 50_000, "inventory": 1_000, "equity": 50_000, "debt": 0}
-
-
-def test_simulate_quarter_profitable_case():
-    decision = {"production": 1_500, "price": 55, "marketing": 2_000}
-    result = simulate_quarter(base_state, decision)
-
-    assert result.quarter == 1
-    assert result.units_sold == 1_300
-    assert result.revenue == 71_500
-    assert result.cogs == 32_500
-    assert result.operating_expenses == 12_000
-    assert result.ebit == 27_000
-    assert result.taxes == 5_400
-    assert result.net_income == 21_600
-    assert result.cash == 72_000
-    assert result.inventory == 1_200
-    assert result.debt == 0
-    assert result.equity == 71_600
-    assert math.isfinite(result.net_margin)
-    assert 0.3 < result.net_margin < 0.31
-
-
-def test_simulate_quarter_short_term_debt():
-    decision = {"production": 0, "price": 30, "marketing": 0}
-    start = {"quarter": 0, "cash": 1_000, "inventory": 0, "equity": 1_000, "debt": 0}
-    result = simulate_quarter(start, decision)
-
-    assert result.quarter == 1
-    assert result.units_sold == 0
-    assert result.revenue == 0
-    assert result.net_income == -10_000
-    assert result.cash == 0
-    assert result.debt == 9_000
-    assert result.equity == -9_000
-    assert result.liquidity_ratio == 0
-    assert result.net_margin == 0
+import numpy as np
+import pytest
+
+from finanzasim.cfa_questions import QUESTION_INDEX, apply_option_impact
+from finanzasim.financial_calculator import FinancialHistory, simulate_game, simulate_quarter, simulate_quarter_batch
+
+
+@pytest.mark.parametrize(
+    "decision,overrides,expected",
+    [
+        pytest.param(
+            {"production": 1_500, "price": 55, "marketing": 2_000},
+            {},
+            {
+                "units_sold": 1_300,
+                "revenue": 71_500,
+                "cogs": 32_500,
+                "operating_expenses": 12_000,
+                "ebit": 27_000,
+                "taxes": 5_400,
+                "net_income": 21_600,
+                "cash": 72_000,
+                "inventory": 1_200,
+                "debt": 0,
+                "equity": 71_600,
+                "net_margin": pytest.approx(21_600 / 71_500),
+            },
+            id="profitable_case",
+        ),
+        pytest.param(
+            {"production": 0, "price": 30, "marketing": 0},
+            {"cash": 1_000, "inventory": 0, "equity": 1_000},
+            {
+                "units_sold": 0,
+                "revenue": 0,
+                "net_income": -10_000,
+                "cash": 0,
+                "debt": 9_000,
+                "equity": -9_000,
+                "liquidity_ratio": 0,
+                "net_margin": 0,
+            },
+            id="short_term_debt",
+        ),
+    ],
+)
+def test_simulate_quarter(base_state, decision, overrides, expected):
+    result = simulate_quarter({**base_state, **overrides}, **decision)._asdict()
+
+    assert result["quarter"] == 1
+    assert {key: result[key] for key in expected} == expected
+
+
+def test_simulate_quarter_batch_matches_scalar(base_state):
+    decisions = [
+        {"production": 1_500, "price": 55, "marketing": 2_000},
+        {"production": 0, "price": 30, "marketing": 0},
+        {"production": 2_000, "price": 120, "marketing": 500},
+    ]
+    batch = simulate_quarter_batch(
+        base_state,
+        *(np.array([d[key] for d in decisions], dtype=float) for key in ("production", "price", "marketing")),
+    )
+
+    for idx, decision in enumerate(decisions):
+        expected = simulate_quarter(base_state, **decision)._asdict()
+        assert {key: values[idx] for key, values in batch.items()} == expected
+
+
+def test_simulate_game_matches_chained_quarters(base_state):
+    decisions = [
+        {"production": 1_400, "price": 55, "marketing": 2_000},
+        {"production": 1_500, "price": 53, "marketing": 2_500},
+        {"production": 1_600, "price": 51, "marketing": 3_000},
+        {"production": 0, "price": 49, "marketing": 3_200},
+    ]
+    neutral = (1.0, 0.0, 1.0, 0.0, 1.0, 0.0)
+
+    replayed = simulate_game(base_state, decisions, [neutral] * len(decisions))
+
+    state = base_state
+    for snapshot, decision in zip(replayed, decisions):
+        expected = simulate_quarter(state, **decision)
+        assert snapshot == expected
+        state = expected._asdict()
+
+
+def test_simulate_game_applies_option_impacts(base_state):
+    decisions = [
+        {"production": 1_400, "price": 55, "marketing": 2_000},
+        {"production": 1_500, "price": 53, "marketing": 2_500},
+        {"production": 1_600, "price": 51, "marketing": 3_000},
+        {"production": 1_650, "price": 49, "marketing": 3_200},
+    ]
+    # Multipliers and deltas on every decision variable.
+    options = [
+        QUESTION_INDEX["q02"].options[1],
+        QUESTION_INDEX["q05"].options[1],
+        QUESTION_INDEX["q07"].options[2],
+        QUESTION_INDEX["q10"].options[0],
+    ]
+
+    replayed = simulate_game(base_state, decisions, [option.impact_vec for option in options])
+
+    state = base_state
+    for snapshot, decision, option in zip(replayed, decisions, options):
+        expected = simulate_quarter(state, **apply_option_impact(decision, option))
+        assert snapshot == expected
+        state = expected._asdict()
+
+
+def test_financial_history_stores_rows_and_reads_back_dicts(base_state):
+    history = FinancialHistory([base_state])
+    for _ in range(6):
+        history.append(simulate_quarter(history[-1], 1_500, 55, 2_000)._asdict())
+
+    assert len(history) == 7
+    assert history[0]["cash"] == 50_000
+    assert history[0]["revenue"] == 0
+    assert history[-1]["quarter"] == 6
+    assert list(history.column("quarter")) == [0, 1, 2, 3, 4, 5, 6]
+    assert history.to_list() == list(history)
+
+
+def test_financial_history_rejects_bad_snapshots_without_adding_rows(base_state):
+    history = FinancialHistory([base_state])
+
+    with pytest.raises(KeyError):
+        history.append({**base_state, "bogus": 1.0})
+    with pytest.raises(ValueError):
+        history.append({**base_state, "cash": "lots"})
+    with pytest.raises(ValueError):
+        history.append_row(np.zeros(3))
+
+    assert len(history) == 1
+
+
+def test_financial_history_reads_are_read_only(base_state):
+    history = FinancialHistory([base_state])
+
+    with pytest.raises(TypeError):
+        history[-1]["cash"] = 0.0
+    with pytest.raises(TypeError):
+        history[:1]
+    assert history[0]["cash"] == 50_000
@@ -0,0 +1,71 @@
+from fastapi.testclient import TestClient
+
+from main import app
+
+client = TestClient(app)
+
+DECISION = {"production": 1_500, "price": 55, "marketing": 2_000}
+
+
+def _create_session():
+    session = client.post("/sessions", json={"company_names": ["Alpha"]}).json()
+    return session["id"], next(iter(session["companies"]))
+
+
+def _play_quarter(session_id, company_id):
+    client.post(f"/sessions/{session_id}/decisions", json={"company_id": company_id, **DECISION})
+    return client.post(f"/sessions/{session_id}/close_quarter")
+
+
+def test_replay_requires_a_finished_game():
+    session_id, company_id = _create_session()
+    _play_quarter(session_id, company_id)
+
+    response = client.post(
+        f"/sessions/{session_id}/replay",
+        json={"company_id": company_id, "decisions": [DECISION], "option_ids": ["A"]},
+    )
+
+    assert response.status_code == 409
+
+
+def test_replay_rejects_mismatched_decisions_and_options():
+    session_id, company_id = _create_session()
+    for _ in range(4):
+        _play_quarter(session_id, company_id)
+
+    mismatched = client.post(
+        f"/sessions/{session_id}/replay",
+        json={"company_id": company_id, "decisions": [DECISION] * 4, "option_ids": ["A"] * 3},
+    )
+    too_long = client.post(
+        f"/sessions/{session_id}/replay",
+        json={"company_id": company_id, "decisions": [DECISION] * 6, "option_ids": ["A"] * 6},
+    )
+    replayed = client.post(
+        f"/sessions/{session_id}/replay",
+        json={"company_id": company_id, "decisions": [DECISION] * 4, "option_ids": ["A"] * 4},
+    )
+
+    assert mismatched.status_code == 422
+    assert too_long.status_code == 422
+    assert replayed.status_code == 200
+    assert [row["quarter"] for row in replayed.json()] == [1, 2, 3, 4]
+
+
+def test_replay_rejects_unknown_option_ids():
+    session_id, company_id = _create_session()
+    for _ in range(4):
+        _play_quarter(session_id, company_id)
+
+    unknown = client.post(
+        f"/sessions/{session_id}/replay",
+        json={"company_id": company_id, "decisions": [DECISION] * 4, "option_ids": ["A", "Z", "A", "A"]},
+    )
+    unanswered = client.post(
+        f"/sessions/{session_id}/replay",
+        json={"company_id": company_id, "decisions": [DECISION] * 4, "option_ids": [None] * 4},
+    )
+
+    assert unknown.status_code == 422
+    assert unanswered.status_code == 200
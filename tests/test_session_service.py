@@ -0,0 +1,89 @@
+import random
+
+from finanzasim.session_service import Company, InMemorySessionRepository, Session, SessionService
+
+
+def test_repository_serialization_is_invalidated_on_save():
+    repository = InMemorySessionRepository()
+    session = Session(
+        id="s2",
+        game_code="CODE2",
+        game_status="Q1",
+        current_quarter=1,
+        last_update_time=0,
+        companies={},
+    )
+    repository.save(session)
+
+    first = repository.get_serialized("s2")
+    assert repository.get_serialized("s2") is first
+
+    session.game_status = "Finished"
+    repository.save(session)
+
+    assert repository.get_serialized("s2") != first
+    assert session.version == 2
+    assert repository.get_serialized("missing") is None
+
+
+def test_repository_ignores_cached_bytes_from_an_older_version():
+    repository = InMemorySessionRepository()
+    session = Session(
+        id="s4",
+        game_code="CODE4",
+        game_status="Q1",
+        current_quarter=1,
+        last_update_time=0,
+        companies={},
+    )
+    repository.save(session)
+    # A serialization that raced with the save below and stored its bytes afterwards.
+    repository._response_cache["s4"] = (session.version, b"stale")
+
+    session.game_status = "Q2"
+    repository.save(session)
+
+    assert b'"game_status":"Q2"' in repository.get_serialized("s4")
+
+
+def test_seeded_rng_makes_question_assignment_reproducible():
+    assigned = []
+    for _ in range(2):
+        repository = InMemorySessionRepository()
+        service = SessionService(repository, rng=random.Random(7))
+        companies = {name: Company(name=name, financials=[]) for name in ("a", "b", "c")}
+        service.assign_questions_to_companies(companies)
+        assigned.append([company.active_question_id for company in companies.values()])
+
+    assert assigned[0] == assigned[1]
+
+
+def test_advance_quarter_closes_and_opens_next_quarter_in_one_save():
+    repository = InMemorySessionRepository()
+    service = SessionService(repository)
+    company = Company(
+        name="Delta",
+        financials=[{"quarter": 0, "cash": 10_000, "inventory": 500, "equity": 10_000, "debt": 0}],
+        decisions={"production": 800, "price": 52, "marketing": 1_000},
+        active_question_id="q03",
+        question_history=["q03"],
+    )
+    session = Session(
+        id="s3",
+        game_code="CODE3",
+        game_status="Q1",
+        current_quarter=1,
+        last_update_time=0,
+        companies={"delta": company},
+    )
+    repository.save(session)
+
+    updated = service.advance_quarter("s3")
+    delta = updated.companies["delta"]
+
+    assert updated.version == 2
+    assert updated.game_status == "Q2"
+    assert updated.last_update_time > 0
+    assert len(delta.financials) == 2
+    assert delta.active_question_id not in (None, "q03")
+    assert delta.question_history == ["q03", delta.active_question_id]